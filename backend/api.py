@@ -1,17 +1,28 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func
 import xgboost as xgb
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pickle
 import shap
 from typing import List, Optional
-import asyncio
-import random
 import json
-from datetime import datetime
-from .database import SessionLocal, Customer, Transaction, RiskScore
+import os
+import csv
+import io
+import threading
+from datetime import datetime, timedelta
+from anyio import from_thread
+from .database import (SessionLocal, Customer, RiskScore, MonthlySpend, ScoringRun, add_transaction,
+                       query_transactions, transactions_since, FEATURE_HORIZON_DAYS)
+from .pubsub import ALERT_THRESHOLD, BUS_SOCKET_ENV, LocalBus, UnixSocketBus
+from models.drift import DriftSketch, load_baseline, baseline_hash
+from models.feature_engineering import customer_features
 
 app = FastAPI(title="Lighthouse API", version="1.0.0")
 
@@ -26,18 +37,51 @@ app.add_middleware(
 
 # Load Model
 MODEL_PATH = "models/xgboost_model.pkl"
+FEATURE_MATRIX_PATH = "data/feature_matrix.csv"
+FEATURE_COLS = ["salary_deviation", "savings_change_pct", "lending_app_count",
+                "bill_delay", "disc_ratio_change", "atm_freq_change"]
+ARROW_STREAM_TYPE = "application/vnd.apache.arrow.stream"
 model = None
+explainer = None
+feature_matrix = None # customer features indexed by customer_id, for batch scoring
+drift_baseline = None
 
-@app.on_event("startup")
-def load_model():
-    global model
+def preload():
+    """Load the model, SHAP explainer, feature matrix and drift baseline.
+
+    gunicorn_conf.py calls this in the master before forking so workers share
+    these read-only objects copy-on-write; a single uvicorn process loads them
+    on startup instead."""
+    global model, explainer, feature_matrix, drift_baseline, realtime_sketch
     try:
         with open(MODEL_PATH, "rb") as f:
             model = pickle.load(f)
+        explainer = shap.TreeExplainer(model)
         print("Model loaded successfully.")
     except Exception as e:
         print(f"Error loading model: {e}")
 
+    try:
+        feature_matrix = pd.read_csv(FEATURE_MATRIX_PATH, index_col="customer_id")[FEATURE_COLS]
+    except Exception as e:
+        print(f"Error loading feature matrix: {e}")
+
+    try:
+        drift_baseline = load_baseline()
+        realtime_sketch = DriftSketch.like(drift_baseline)
+    except Exception as e:
+        print(f"Error loading drift baseline: {e}")
+
+@app.on_event("startup")
+def load_model():
+    if model is None:
+        preload()
+
+@app.on_event("shutdown")
+def flush_drift():
+    with drift_lock:
+        flush_realtime_sketch()
+
 # Pydantic Models
 class CustomerResponse(BaseModel):
     customer_id: int
@@ -66,6 +110,41 @@ class SimulationRequest(BaseModel):
     atm_freq_change: float
     salary_deviation: float
 
+class FeatureRow(BaseModel):
+    customer_id: Optional[int] = None
+    salary_deviation: float
+    savings_change_pct: float
+    lending_app_count: int
+    bill_delay: int
+    disc_ratio_change: float
+    atm_freq_change: float
+
+class TransactionCreate(BaseModel):
+    date: Optional[datetime] = None
+    type: str
+    amount: float
+    category: str
+    merchant: str
+
+class BatchScoreRequest(BaseModel):
+    customer_ids: List[int] = []
+    rows: List[FeatureRow] = []
+
+def risk_level(score: float) -> str:
+    if score > 70: return "High"
+    if score > 30: return "Medium"
+    return "Low"
+
+def top_factors(shap_row, n=3):
+    pairs = sorted(zip(FEATURE_COLS, shap_row), key=lambda x: abs(x[1]), reverse=True)
+    return [{"feature": k, "impact": round(float(v), 4)} for k, v in pairs[:n]]
+
+def parse_factors(value):
+    # batch_scorer stores factors as a JSON string inside the JSON column
+    if isinstance(value, str):
+        return json.loads(value)
+    return value or []
+
 # Routes
 @app.get("/customers", response_model=List[CustomerResponse])
 def get_customers(skip: int = 0, limit: int = 100):
@@ -77,11 +156,7 @@ def get_customers(skip: int = 0, limit: int = 100):
         # Fetch latest risk score
         latest_score = db.query(RiskScore).filter(RiskScore.customer_id == c.customer_id).order_by(RiskScore.date.desc()).first()
         score_val = latest_score.score if latest_score else None
-        
-        level = "Low"
-        if score_val:
-            if score_val > 70: level = "High"
-            elif score_val > 30: level = "Medium"
+        level = risk_level(score_val) if score_val is not None else "Low"
             
         results.append({
             "customer_id": c.customer_id,
@@ -103,18 +178,113 @@ def get_customer_detail(customer_id: int):
         db.close()
         raise HTTPException(status_code=404, detail="Customer not found")
         
-    transactions = db.query(Transaction).filter(Transaction.customer_id == customer_id).order_by(Transaction.date.desc()).limit(50).all()
+    transactions, next_cursor = transaction_page(db, customer_id, None, TRANSACTION_PAGE_SIZE)
     
     latest_score = db.query(RiskScore).filter(RiskScore.customer_id == customer_id).order_by(RiskScore.date.desc()).first()
+
+    monthly = db.query(MonthlySpend).filter(MonthlySpend.customer_id == customer_id).order_by(MonthlySpend.month, MonthlySpend.category).all()
     
     db.close()
     
     return {
         "profile": customer,
         "risk_score": latest_score,
-        "transactions": transactions
+        "transactions": transactions,
+        "next_cursor": next_cursor,
+        "monthly_spending": [
+            {"month": m.month, "category": m.category, "type": m.type, "total": m.total, "count": m.txn_count}
+            for m in monthly
+        ]
     }
 
+# --- Transaction History ---
+
+TRANSACTION_PAGE_SIZE = 50
+MAX_TRANSACTION_PAGE_SIZE = 500
+
+def transaction_page(db, customer_id, cursor, limit):
+    """Newest-first page of transactions older than `cursor`, walking the
+    monthly partitions' (customer_id, date) index instead of an OFFSET.
+
+    The cursor is "<iso date>_<id>" of the last row returned; id breaks ties
+    between transactions with the same timestamp (and so the same partition)."""
+    before = before_id = None
+    if cursor:
+        try:
+            date_str, before_id = cursor.rsplit("_", 1)
+            before, before_id = datetime.fromisoformat(date_str), int(before_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    rows = query_transactions(db, customer_id, before, before_id, limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1]['date'].isoformat()}_{rows[-1]['id']}"
+    return rows, next_cursor
+
+@app.get("/customer/{customer_id}/transactions")
+def get_customer_transactions(customer_id: int, cursor: Optional[str] = None, limit: int = TRANSACTION_PAGE_SIZE):
+    limit = max(1, min(limit, MAX_TRANSACTION_PAGE_SIZE))
+    db = SessionLocal()
+    try:
+        transactions, next_cursor = transaction_page(db, customer_id, cursor, limit)
+    finally:
+        db.close()
+    return {"transactions": transactions, "next_cursor": next_cursor}
+
+@app.post("/customer/{customer_id}/transactions")
+def ingest_transaction(customer_id: int, req: TransactionCreate):
+    db = SessionLocal()
+    try:
+        customer = db.query(Customer).filter(Customer.customer_id == customer_id).first()
+        if not customer:
+            raise HTTPException(status_code=404, detail="Customer not found")
+        name = customer.name
+        date = req.date or datetime.now()
+        if date.tzinfo is not None:
+            # Stored dates are naive local time
+            date = date.astimezone().replace(tzinfo=None)
+        try:
+            txn = add_transaction(db, customer_id, date, req.type,
+                                  req.amount, req.category, req.merchant)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        previous = db.query(RiskScore).filter(RiskScore.customer_id == customer_id).order_by(RiskScore.date.desc()).first()
+        previous_score = previous.score if previous else None
+        new_score = rescore_customer(db, customer_id) if model else None
+    finally:
+        db.close()
+    if new_score is not None and new_score != previous_score:
+        # Sync endpoints run in a worker thread; the bus lives on the event loop
+        from_thread.run(publish_alert, {
+            "customer_id": customer_id,
+            "name": name,
+            "previous_score": previous_score,
+            "new_score": new_score,
+            "alert": new_score > ALERT_THRESHOLD,
+            "timestamp": datetime.now().isoformat()
+        })
+    return txn
+
+def rescore_customer(db, customer_id):
+    """Recompute a customer's features the way feature_engineering.py does,
+    over the 90 days up to their newest transaction, and store the new
+    score. Returns None when the customer has no raw transactions."""
+    newest = query_transactions(db, customer_id, limit=1)
+    if not newest:
+        return None
+    since = newest[0]["date"] - timedelta(days=FEATURE_HORIZON_DAYS)
+    txns = pd.DataFrame(transactions_since(db, customer_id, since))
+    txns["date"] = pd.to_datetime(txns["date"])
+    X = pd.DataFrame([customer_features(customer_id, txns)])[FEATURE_COLS]
+    score = round(float(model.predict_proba(X)[0][1] * 100), 2)
+    observe_scores(X, [score])
+    db.add(RiskScore(customer_id=customer_id, score=score,
+                     risk_factors=top_factors(explainer.shap_values(X)[0])))
+    db.commit()
+    return score
+
 @app.post("/score", response_model=ScoreResponse)
 def score_customer(req: ScoreRequest):
     db = SessionLocal()
@@ -122,15 +292,11 @@ def score_customer(req: ScoreRequest):
     db.close()
     
     if existing_score:
-        level = "Low"
-        if existing_score.score > 70: level = "High"
-        elif existing_score.score > 30: level = "Medium"
-            
         return {
             "customer_id": req.customer_id,
             "risk_score": existing_score.score,
-            "risk_level": level,
-            "risk_factors": existing_score.risk_factors or []
+            "risk_level": risk_level(existing_score.score),
+            "risk_factors": parse_factors(existing_score.risk_factors)
         }
     
     raise HTTPException(status_code=404, detail="Score not found (run batch scoring first)")
@@ -151,30 +317,316 @@ def simulate_risk(req: SimulationRequest):
     
     prob = model.predict_proba(input_data)[0][1]
     score = float(prob * 100)
+    observe_scores(input_data[FEATURE_COLS], [score])
     
     # SHAP for finding contributors
-    explainer = shap.TreeExplainer(model)
     shap_values = explainer.shap_values(input_data)
     
-    # map shap values to features
-    feature_names = input_data.columns
-    contributions = zip(feature_names, shap_values[0])
-    
-    # Sort by absolute contribution
-    sorted_contribs = sorted(contributions, key=lambda x: abs(x[1]), reverse=True)
-    
-    top_factors = [{"feature": k, "impact": float(v)} for k, v in sorted_contribs[:3]]
-    
-    level = "Low"
-    if score > 70: level = "High"
-    elif score > 30: level = "Medium"
-    
     return {
         "risk_score": score,
-        "risk_level": level,
-        "top_factors": top_factors
+        "risk_level": risk_level(score),
+        "top_factors": top_factors(shap_values[0])
+    }
+
+# --- Batch Scoring ---
+
+BATCH_LOOKUP_CHUNK = 500 # stay under SQLite's bound-parameter limit
+
+def latest_score_subquery(db, customer_ids=None):
+    """(customer_id, date) of each customer's most recent RiskScore."""
+    q = db.query(RiskScore.customer_id, func.max(RiskScore.date).label("date"))
+    if customer_ids is not None:
+        q = q.filter(RiskScore.customer_id.in_(customer_ids))
+    return q.group_by(RiskScore.customer_id).subquery()
+
+def latest_scores(db, customer_ids):
+    """Latest stored RiskScore per customer, fetched in chunked IN queries."""
+    found = {}
+    for i in range(0, len(customer_ids), BATCH_LOOKUP_CHUNK):
+        chunk = customer_ids[i:i+BATCH_LOOKUP_CHUNK]
+        latest = latest_score_subquery(db, chunk)
+        rows = db.query(RiskScore).join(
+            latest, (RiskScore.customer_id == latest.c.customer_id) & (RiskScore.date == latest.c.date)
+        ).all()
+        for r in rows:
+            found[r.customer_id] = r
+    return found
+
+def validation_detail(e: ValidationError):
+    # The raw input may be bytes (an unparseable body), which JSON can't encode
+    return e.errors(include_url=False, include_input=False)
+
+def parse_arrow_batch(body: bytes) -> BatchScoreRequest:
+    """An Arrow IPC stream with the feature columns is scored as raw rows;
+    a stream with only customer_id is treated as an id lookup."""
+    try:
+        df = pa.ipc.open_stream(body).read_pandas()
+    except pa.ArrowInvalid as e:
+        raise HTTPException(status_code=400, detail=f"Invalid Arrow IPC stream: {e}")
+
+    if all(c in df.columns for c in FEATURE_COLS):
+        cols = FEATURE_COLS + (["customer_id"] if "customer_id" in df.columns else [])
+        # Arrow nulls arrive as NaN; turn them back into None for validation
+        records = df[cols].astype(object).where(df[cols].notna(), None).to_dict(orient="records")
+        try:
+            rows = [FeatureRow(**r) for r in records]
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=validation_detail(e))
+        return BatchScoreRequest(rows=rows)
+    if "customer_id" in df.columns:
+        ids = df["customer_id"]
+        if ids.isna().any() or not (ids == ids.round()).all():
+            raise HTTPException(status_code=422, detail="customer_id must be a non-null integer")
+        return BatchScoreRequest(customer_ids=ids.astype(int).tolist())
+    raise HTTPException(status_code=400, detail="Arrow batch needs customer_id or all feature columns")
+
+def stream_batch_scores(req: BatchScoreRequest):
+    """Yield one NDJSON line per input: stored scores first, then every
+    uncached row scored together in a single model + SHAP call."""
+    pending_keys = []
+    pending_rows = []
+
+    if req.customer_ids:
+        db = SessionLocal()
+        try:
+            stored = latest_scores(db, req.customer_ids)
+        finally:
+            db.close()
+
+        for cid in req.customer_ids:
+            existing = stored.get(cid)
+            if existing:
+                yield json.dumps({
+                    "customer_id": cid,
+                    "risk_score": existing.score,
+                    "risk_level": risk_level(existing.score),
+                    "risk_factors": parse_factors(existing.risk_factors),
+                    "source": "stored"
+                }) + "\n"
+            elif feature_matrix is not None and cid in feature_matrix.index:
+                pending_keys.append({"customer_id": cid})
+                pending_rows.append(feature_matrix.loc[cid].tolist())
+            else:
+                yield json.dumps({"customer_id": cid, "error": "Customer not found"}) + "\n"
+
+    for i, row in enumerate(req.rows):
+        pending_keys.append({"row": i, "customer_id": row.customer_id})
+        pending_rows.append([getattr(row, c) for c in FEATURE_COLS])
+
+    if not pending_rows:
+        return
+
+    X = pd.DataFrame(pending_rows, columns=FEATURE_COLS)
+    scores = model.predict_proba(X)[:, 1] * 100
+    observe_scores(X, scores)
+    shap_values = explainer.shap_values(X)
+
+    for key, score, sv in zip(pending_keys, scores, shap_values):
+        score = round(float(score), 2)
+        yield json.dumps({
+            **key,
+            "risk_score": score,
+            "risk_level": risk_level(score),
+            "risk_factors": top_factors(sv),
+            "source": "model"
+        }) + "\n"
+
+@app.post("/score/batch")
+async def score_batch(request: Request):
+    if not model:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(ARROW_STREAM_TYPE):
+        req = parse_arrow_batch(body)
+    else:
+        try:
+            req = BatchScoreRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=validation_detail(e))
+
+    return StreamingResponse(stream_batch_scores(req), media_type="application/x-ndjson")
+
+# --- Drift Monitoring ---
+
+# Realtime scores are sketched in memory and stored as a ScoringRun every
+# REALTIME_FLUSH_ROWS rows, so memory stays bounded however long the server runs.
+REALTIME_FLUSH_ROWS = 1000
+realtime_sketch = None
+drift_lock = threading.Lock()
+
+def flush_realtime_sketch():
+    global realtime_sketch
+    if realtime_sketch is None or not realtime_sketch.rows:
+        return
+    db = SessionLocal()
+    try:
+        db.add(ScoringRun(source="realtime", row_count=realtime_sketch.rows,
+                          baseline_hash=baseline_hash(drift_baseline),
+                          sketches=realtime_sketch.to_dict()))
+        db.commit()
+    finally:
+        db.close()
+    realtime_sketch = DriftSketch.like(drift_baseline)
+
+def observe_scores(X, scores):
+    if realtime_sketch is None:
+        return
+    with drift_lock:
+        realtime_sketch.update(X, np.asarray(scores, dtype=float))
+        if realtime_sketch.rows >= REALTIME_FLUSH_ROWS:
+            flush_realtime_sketch()
+
+@app.get("/drift")
+def get_drift(source: str = "batch", runs: int = 1):
+    """PSI/KS of each feature and the score versus the training baseline, over
+    the latest `runs` stored runs of `source` merged together. Only runs
+    sketched against the current baseline can be merged; older ones (from
+    before a retrain) are counted in skipped_runs."""
+    if drift_baseline is None:
+        raise HTTPException(status_code=503, detail="Drift baseline not loaded (run models/risk_model.py)")
+    if source not in ("batch", "realtime"):
+        raise HTTPException(status_code=400, detail="source must be 'batch' or 'realtime'")
+
+    current = baseline_hash(drift_baseline)
+    db = SessionLocal()
+    try:
+        q = db.query(ScoringRun).filter(ScoringRun.source == source)
+        stored = q.filter(ScoringRun.baseline_hash == current).order_by(ScoringRun.date.desc()).limit(max(runs, 1)).all()
+        skipped = q.filter((ScoringRun.baseline_hash != current) | (ScoringRun.baseline_hash == None)).count()
+    finally:
+        db.close()
+
+    merged = DriftSketch.like(drift_baseline)
+    for run in stored:
+        merged.merge(DriftSketch.from_dict(run.sketches))
+    if source == "realtime":
+        with drift_lock:
+            merged.merge(realtime_sketch)
+
+    return {
+        "source": source,
+        "run_ids": [r.id for r in stored],
+        "skipped_runs": skipped,
+        "row_count": merged.rows,
+        "columns": merged.compare(drift_baseline)
     }
 
+# --- Portfolio Export ---
+
+EXPORT_CHUNK = 1000 # rows fetched from the cursor and written per chunk
+EXPORT_COLUMNS = ["customer_id", "name", "age", "income", "loan_amount", "emi_amount",
+                  "is_delinquent", "risk_score", "risk_level", "scored_at",
+                  "top_factor_1", "top_factor_2", "top_factor_3"]
+EXPORT_SCHEMA = pa.schema([
+    ("customer_id", pa.int64()), ("name", pa.string()), ("age", pa.int64()),
+    ("income", pa.float64()), ("loan_amount", pa.float64()), ("emi_amount", pa.float64()),
+    ("is_delinquent", pa.int64()), ("risk_score", pa.float64()), ("risk_level", pa.string()),
+    ("scored_at", pa.timestamp("us")), ("top_factor_1", pa.string()),
+    ("top_factor_2", pa.string()), ("top_factor_3", pa.string()),
+])
+
+def iter_export_chunks():
+    """Customers joined with their latest score, read through a server-side
+    cursor and yielded as lists of dicts of at most EXPORT_CHUNK rows."""
+    db = SessionLocal()
+    try:
+        latest = latest_score_subquery(db)
+        q = db.query(
+            Customer.customer_id, Customer.name, Customer.age, Customer.income,
+            Customer.loan_amount, Customer.emi_amount, Customer.is_delinquent,
+            RiskScore.score, RiskScore.date, RiskScore.risk_factors
+        ).outerjoin(
+            latest, Customer.customer_id == latest.c.customer_id
+        ).outerjoin(
+            RiskScore, (RiskScore.customer_id == latest.c.customer_id) & (RiskScore.date == latest.c.date)
+        ).order_by(Customer.customer_id).execution_options(stream_results=True).yield_per(EXPORT_CHUNK)
+
+        chunk = []
+        for r in q:
+            factors = [f["feature"] for f in parse_factors(r.risk_factors)[:3]]
+            factors += [None] * (3 - len(factors))
+            chunk.append({
+                "customer_id": r.customer_id,
+                "name": r.name,
+                "age": r.age,
+                "income": r.income,
+                "loan_amount": r.loan_amount,
+                "emi_amount": r.emi_amount,
+                "is_delinquent": r.is_delinquent,
+                "risk_score": r.score,
+                "risk_level": risk_level(r.score) if r.score is not None else None,
+                "scored_at": r.date,
+                "top_factor_1": factors[0],
+                "top_factor_2": factors[1],
+                "top_factor_3": factors[2],
+            })
+            if len(chunk) >= EXPORT_CHUNK:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        db.close()
+
+def stream_export_csv():
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for chunk in iter_export_chunks():
+        writer.writerows(chunk)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+class DrainableSink(io.RawIOBase):
+    """Write-only file object whose buffered bytes can be taken out as they
+    are produced, so Parquet row groups are sent instead of accumulated."""
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+def stream_export_parquet():
+    sink = DrainableSink()
+    writer = pq.ParquetWriter(sink, EXPORT_SCHEMA)
+    try:
+        for chunk in iter_export_chunks():
+            writer.write_table(pa.Table.from_pylist(chunk, schema=EXPORT_SCHEMA))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+@app.get("/customers/export")
+def export_customers(format: str = "csv"):
+    if format == "csv":
+        return StreamingResponse(stream_export_csv(), media_type="text/csv",
+                                 headers={"Content-Disposition": "attachment; filename=portfolio.csv"})
+    if format == "parquet":
+        return StreamingResponse(stream_export_parquet(), media_type="application/vnd.apache.parquet",
+                                 headers={"Content-Disposition": "attachment; filename=portfolio.parquet"})
+    raise HTTPException(status_code=400, detail="format must be 'csv' or 'parquet'")
+
 # --- Real-time Simulation ---
 
 class ConnectionManager:
@@ -186,44 +638,48 @@ class ConnectionManager:
         self.active_connections.append(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        if websocket in self.active_connections:
+            self.active_connections.remove(websocket)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        for connection in list(self.active_connections):
+            try:
+                await connection.send_text(message)
+            except Exception:
+                self.disconnect(connection)
 
 manager = ConnectionManager()
+alert_bus = None
+
+async def deliver_alert(event: dict):
+    await manager.broadcast(json.dumps(event))
+
+async def publish_alert(event: dict):
+    """Send an alert to websocket clients on every worker."""
+    await alert_bus.publish(event)
+
+@app.on_event("startup")
+async def start_alert_bus():
+    global alert_bus
+    # Set by gunicorn_conf.py when a broker bridges several workers
+    path = os.environ.get(BUS_SOCKET_ENV)
+    alert_bus = UnixSocketBus(path, deliver_alert) if path else LocalBus(deliver_alert)
+    await alert_bus.start()
+
+@app.on_event("shutdown")
+async def stop_alert_bus():
+    if alert_bus:
+        await alert_bus.stop()
 
 @app.websocket("/ws/simulate")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
+        # Events arrive through the alert bus; just wait for the client to leave
         while True:
-            # Simulate a transaction event every 2 seconds
-            await asyncio.sleep(2)
-            
-            # Pick random customer
-            customer_id = random.randint(0, 500) # limiting to first 500 for demo overlap with delinquent
-            
-            # Generate random score change
-            # In real system, we'd add txn and rescore. Here we mock:
-            new_score = random.uniform(10, 95)
-            
-            # Alert logic
-            is_alert = new_score > 75
-            
-            event = {
-                "customer_id": customer_id,
-                "name": f"Customer {customer_id}", # Ideally fetch name from DB but ok
-                "new_score": new_score,
-                "alert": is_alert,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            await websocket.send_text(json.dumps(event))
-            
+            await websocket.receive_text()
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
         print(f"WS Error: {e}")
-        # manager.disconnect(websocket) # might fail if already closed
+        manager.disconnect(websocket)
@@ -0,0 +1,154 @@
+"""
+API benchmarks. Run from the project root after seeding and batch scoring:
+
+    python backend/benchmark.py                    # bulk endpoints, in-process
+    python backend/benchmark.py workers 1 2 4      # multi-worker memory and requests/sec
+"""
+import argparse
+import asyncio
+import signal
+import subprocess
+import sys
+import os
+import time
+import tracemalloc
+
+import httpx
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.api import app
+from backend.database import SessionLocal, Customer
+
+def bench_export(client, fmt, n_rows):
+    tracemalloc.start()
+    start = time.perf_counter()
+    total_bytes = 0
+    with client.stream("GET", f"/customers/export?format={fmt}") as resp:
+        resp.raise_for_status()
+        for part in resp.iter_bytes():
+            total_bytes += len(part)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  export {fmt:<8} {n_rows} rows, {total_bytes / 1e6:.1f} MB in {elapsed:.2f}s "
+          f"-> {n_rows / elapsed:,.0f} rows/s, peak traced memory {peak / 1e6:.1f} MB")
+
+def bench_bulk():
+    db = SessionLocal()
+    n_customers = db.query(Customer).count()
+    db.close()
+
+    with TestClient(app) as client:
+        print("Portfolio export:")
+        bench_export(client, "csv", n_customers)
+        bench_export(client, "parquet", n_customers)
+
+# --- Multi-worker ---
+
+BENCH_PORT = 8099
+SIMULATE_BODY = {"income": 60000, "salary_deviation": 5, "savings_change_pct": -0.3,
+                 "lending_app_count": 3, "bill_delay": 8, "disc_ratio_change": 0.1,
+                 "atm_freq_change": 2}
+
+def child_pids(pid):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+def memory_mb(pid):
+    """(PSS, USS) in MB; PSS splits shared pages between the processes mapping them."""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    uss = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return fields.get("Pss", 0) / 1024, uss / 1024
+
+def is_worker(pid):
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return b"gunicorn" in f.read() # the alert broker is a spawned multiprocessing child
+
+async def load(url, duration, concurrency):
+    done = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(client):
+        nonlocal done
+        while time.perf_counter() < deadline:
+            resp = await client.post(url, json=SIMULATE_BODY)
+            resp.raise_for_status()
+            done += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+    return done / duration
+
+def wait_until_up(base_url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{base_url}/docs", timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+def bench_workers(worker_counts, duration, concurrency):
+    base_url = f"http://127.0.0.1:{BENCH_PORT}"
+    print("Workers  Startup  Master PSS  Worker PSS  Worker USS  Total PSS     Req/s")
+    for n in worker_counts:
+        env = dict(os.environ, PORT=str(BENCH_PORT), WEB_CONCURRENCY=str(n))
+        start = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn_conf.py", "backend.api:app"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_up(base_url)
+            startup = time.perf_counter() - start
+            rps = asyncio.run(load(f"{base_url}/simulate", duration, concurrency))
+
+            workers = [pid for pid in child_pids(server.pid) if is_worker(pid)]
+            master_pss, _ = memory_mb(server.pid)
+            per_worker = [memory_mb(pid) for pid in workers]
+            worker_pss = sum(p for p, _ in per_worker) / len(per_worker)
+            worker_uss = sum(u for _, u in per_worker) / len(per_worker)
+            total_pss = master_pss + sum(p for p, _ in per_worker)
+            print(f"{n:>7}  {startup:6.1f}s  {master_pss:8.0f}MB  {worker_pss:8.0f}MB  "
+                  f"{worker_uss:8.0f}MB  {total_pss:7.0f}MB  {rps:8.0f}")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(30)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Lighthouse API.")
+    parser.add_argument("mode", nargs="?", default="bulk", choices=["bulk", "workers"])
+    parser.add_argument("counts", nargs="*", type=int, default=[1, 2, 4],
+                        help="worker counts to compare (workers mode)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent client requests")
+    args = parser.parse_args()
+
+    if args.mode == "workers":
+        bench_workers(args.counts, args.duration, args.concurrency)
+    else:
+        bench_bulk()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON, Index, UniqueConstraint, Table, text, select, inspect
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateTable, CreateIndex
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import pandas as pd
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta
 
 DATABASE_URL = "sqlite:///./lighthouse.db"
 
@@ -23,21 +26,83 @@ class Customer(Base):
     join_date = Column(String) # Storing as string for simplicity in SQLite
     is_delinquent = Column(Integer)
     
-    transactions = relationship("Transaction", back_populates="customer")
     risk_scores = relationship("RiskScore", back_populates="customer")
 
-class Transaction(Base):
-    __tablename__ = "transactions"
-    
+# Transactions are stored in monthly partitions (transactions_YYYYMM) so inserts
+# and per-customer lookups only touch one small table. Partitions that fall
+# entirely outside the feature horizon are compacted into daily_spend.
+FEATURE_HORIZON_DAYS = 90 # feature_engineering.py looks back at most 90 days
+PARTITION_PREFIX = "transactions_"
+LEGACY_TRANSACTIONS_TABLE = "transactions"
+
+def partition_key(date) -> str:
+    return date.strftime("%Y%m")
+
+def partition_table(key: str) -> Table:
+    """Table object for the YYYYMM partition (defined once, not created)."""
+    name = PARTITION_PREFIX + key
+    if name in Base.metadata.tables:
+        return Base.metadata.tables[name]
+    return Table(
+        name, Base.metadata,
+        Column("id", Integer, primary_key=True),
+        Column("customer_id", Integer, ForeignKey("customers.customer_id")),
+        Column("date", DateTime),
+        Column("type", String),
+        Column("amount", Float),
+        Column("category", String),
+        Column("merchant", String),
+        Column("seeded", Boolean, default=False), # loaded from the CSVs rather than ingested
+        Index(f"ix_{name}_customer_date", "customer_id", "date"),
+    )
+
+def list_partitions(bind) -> list:
+    """YYYYMM keys of the partitions present in the database, oldest first."""
+    keys = [name[len(PARTITION_PREFIX):] for name in inspect(bind).get_table_names()
+            if name.startswith(PARTITION_PREFIX) and name[len(PARTITION_PREFIX):].isdigit()]
+    return sorted(keys)
+
+def ensure_partition(bind, key: str) -> Table:
+    # IF NOT EXISTS rather than checkfirst: two workers can both see the
+    # table missing when the first transaction of a month arrives
+    table = partition_table(key)
+    bind.execute(CreateTable(table, if_not_exists=True))
+    for index in table.indexes:
+        bind.execute(CreateIndex(index, if_not_exists=True))
+    return table
+
+class MonthlySpend(Base):
+    """Per-customer monthly totals by category, kept in step with transactions."""
+    __tablename__ = "monthly_spend"
+
     id = Column(Integer, primary_key=True, index=True)
     customer_id = Column(Integer, ForeignKey("customers.customer_id"))
-    date = Column(DateTime)
+    month = Column(String) # YYYY-MM
+    category = Column(String)
     type = Column(String)
-    amount = Column(Float)
+    total = Column(Float, default=0.0)
+    txn_count = Column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("customer_id", "month", "category", "type", name="uq_monthly_spend"),
+    )
+
+class DailySpend(Base):
+    """Per-customer daily totals by category for compacted (dropped) partitions."""
+    __tablename__ = "daily_spend"
+
+    id = Column(Integer, primary_key=True, index=True)
+    customer_id = Column(Integer, ForeignKey("customers.customer_id"))
+    day = Column(String) # YYYY-MM-DD
     category = Column(String)
-    merchant = Column(String)
-    
-    customer = relationship("Customer", back_populates="transactions")
+    type = Column(String)
+    total = Column(Float, default=0.0)
+    txn_count = Column(Integer, default=0)
+    seeded = Column(Boolean, default=False) # compacted from seeded rather than ingested rows
+
+    __table_args__ = (
+        UniqueConstraint("customer_id", "day", "category", "type", "seeded", name="uq_daily_spend"),
+    )
 
 class RiskScore(Base):
     __tablename__ = "risk_scores"
@@ -50,8 +115,185 @@ class RiskScore(Base):
     
     customer = relationship("Customer", back_populates="risk_scores")
 
+class ScoringRun(Base):
+    """Drift sketches (see models/drift.py) for one batch run or one flushed
+    window of realtime scoring."""
+    __tablename__ = "scoring_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(DateTime, default=datetime.utcnow)
+    source = Column(String, index=True) # batch | realtime
+    row_count = Column(Integer)
+    baseline_hash = Column(String, index=True) # drift baseline the sketches' bins came from
+    sketches = Column(JSON)
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    migrate_legacy_transactions()
+    add_missing_columns()
+
+def add_missing_columns():
+    """create_all never alters existing tables; add columns introduced since."""
+    with engine.begin() as conn:
+        existing = {c["name"] for c in inspect(conn).get_columns(ScoringRun.__tablename__)}
+        if "baseline_hash" not in existing:
+            conn.execute(text(f"ALTER TABLE {ScoringRun.__tablename__} ADD COLUMN baseline_hash VARCHAR"))
+
+        # Rows that predate the seeded flag were loaded by seed_data
+        for key in list_partitions(conn):
+            if "seeded" not in {c["name"] for c in inspect(conn).get_columns(PARTITION_PREFIX + key)}:
+                conn.execute(text(f"ALTER TABLE {PARTITION_PREFIX}{key} ADD COLUMN seeded BOOLEAN NOT NULL DEFAULT 1"))
+        if "seeded" not in {c["name"] for c in inspect(conn).get_columns(DailySpend.__tablename__)}:
+            # The flag is part of the unique key, which SQLite can't alter: rebuild the table
+            conn.execute(text("ALTER TABLE daily_spend RENAME TO daily_spend_old"))
+            for index in DailySpend.__table__.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+            DailySpend.__table__.create(conn)
+            conn.execute(text("""
+                INSERT INTO daily_spend (customer_id, day, category, type, total, txn_count, seeded)
+                SELECT customer_id, day, category, type, total, txn_count, 1 FROM daily_spend_old
+            """))
+            conn.execute(text("DROP TABLE daily_spend_old"))
+
+def migrate_legacy_transactions():
+    """Move rows from the old single transactions table into monthly partitions."""
+    with engine.begin() as conn:
+        if LEGACY_TRANSACTIONS_TABLE not in inspect(conn).get_table_names():
+            return
+        print("Migrating transactions into monthly partitions...")
+        keys = [r[0] for r in conn.execute(text(
+            f"SELECT DISTINCT strftime('%Y%m', date) FROM {LEGACY_TRANSACTIONS_TABLE} WHERE date IS NOT NULL"
+        ))]
+        for key in keys:
+            table = ensure_partition(conn, key)
+            conn.execute(text(f"""
+                INSERT INTO {table.name} (customer_id, date, type, amount, category, merchant, seeded)
+                SELECT customer_id, date, type, amount, category, merchant, 1
+                FROM {LEGACY_TRANSACTIONS_TABLE} WHERE strftime('%Y%m', date) = :key
+            """), {"key": key})
+        conn.execute(text(f"DROP TABLE {LEGACY_TRANSACTIONS_TABLE}"))
+
+def spend_source_sql(bind) -> str:
+    """UNION ALL of raw partitions and compacted daily totals, as
+    (customer_id, date, category, type, amount, n) rows."""
+    parts = [f"SELECT customer_id, date, category, type, amount, 1 AS n FROM {PARTITION_PREFIX}{key}"
+             for key in list_partitions(bind)]
+    parts.append("SELECT customer_id, day AS date, category, type, total AS amount, txn_count AS n FROM daily_spend")
+    return " UNION ALL ".join(parts)
+
+def build_monthly_rollups(db):
+    """Rebuild the monthly_spend rollup from partitions and compacted days."""
+    db.query(MonthlySpend).delete()
+    db.execute(text(f"""
+        INSERT INTO monthly_spend (customer_id, month, category, type, total, txn_count)
+        SELECT customer_id, strftime('%Y-%m', date), category, type, SUM(amount), SUM(n)
+        FROM ({spend_source_sql(db.connection())})
+        GROUP BY customer_id, strftime('%Y-%m', date), category, type
+    """))
+    db.commit()
+
+def upsert_spend(db, model, key_cols, values, amount, count):
+    stmt = sqlite_insert(model).values(**values, total=amount, txn_count=count)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_cols,
+        set_={"total": model.total + stmt.excluded.total,
+              "txn_count": model.txn_count + stmt.excluded.txn_count}
+    )
+    db.execute(stmt)
+
+def horizon_cutoff(now=None):
+    """Start of the feature horizon, measured back from the wall clock so a
+    single far-future row can't drag live partitions out of it."""
+    return (now or datetime.now()) - timedelta(days=FEATURE_HORIZON_DAYS)
+
+def partition_end(key: str) -> datetime:
+    year, month = int(key[:4]), int(key[4:])
+    return datetime(year + month // 12, month % 12 + 1, 1)
+
+def add_transaction(db, customer_id, date, type, amount, category, merchant):
+    """Insert a transaction into its monthly partition and fold it into the
+    monthly rollup in the same commit. Late rows for a month that has already
+    been compacted go straight into daily_spend. Future dates are rejected."""
+    if date > datetime.now():
+        raise ValueError("Transaction date is in the future")
+    key = partition_key(date)
+    conn = db.connection()
+    txn = {"customer_id": customer_id, "date": date, "type": type,
+           "amount": amount, "category": category, "merchant": merchant}
+
+    if key not in list_partitions(conn) and partition_end(key) <= horizon_cutoff():
+        upsert_spend(db, DailySpend, ["customer_id", "day", "category", "type", "seeded"],
+                     {"customer_id": customer_id, "day": date.strftime("%Y-%m-%d"),
+                      "category": category, "type": type, "seeded": False}, amount, 1)
+    else:
+        table = ensure_partition(conn, key)
+        txn["id"] = db.execute(table.insert().values(**txn)).inserted_primary_key[0]
+
+    upsert_spend(db, MonthlySpend, ["customer_id", "month", "category", "type"],
+                 {"customer_id": customer_id, "month": date.strftime("%Y-%m"),
+                  "category": category, "type": type}, amount, 1)
+    db.commit()
+    return txn
+
+def query_transactions(db, customer_id, before=None, before_id=None, limit=50):
+    """Newest-first transactions for a customer, strictly older than
+    (before, before_id), reading partitions newest first and stopping as
+    soon as `limit` rows are found."""
+    rows = []
+    for key in reversed(list_partitions(db.connection())):
+        if before is not None and key > partition_key(before):
+            continue
+        table = partition_table(key)
+        q = select(table).where(table.c.customer_id == customer_id)
+        if before is not None:
+            q = q.where((table.c.date < before) | ((table.c.date == before) & (table.c.id < before_id)))
+        q = q.order_by(table.c.date.desc(), table.c.id.desc()).limit(limit - len(rows))
+        rows.extend(dict(r._mapping) for r in db.execute(q))
+        if len(rows) >= limit:
+            break
+    return rows
+
+def transactions_since(db, customer_id, since):
+    """Oldest-first raw transactions for a customer from `since` on. Rows
+    inside the feature horizon are never compacted, so this is complete for
+    any `since` at or after horizon_cutoff()."""
+    rows = []
+    for key in list_partitions(db.connection()):
+        if key < partition_key(since):
+            continue
+        table = partition_table(key)
+        q = select(table).where((table.c.customer_id == customer_id) & (table.c.date >= since))
+        rows.extend(dict(r._mapping) for r in db.execute(q.order_by(table.c.date, table.c.id)))
+    return rows
+
+def compact_partitions(db, now=None):
+    """Roll partitions that end before the feature horizon into daily_spend
+    and drop their raw rows. Monthly rollups are unaffected. The partition
+    holding today is never compacted."""
+    now = now or datetime.now()
+    cutoff = horizon_cutoff(now)
+    current = partition_key(now)
+
+    compacted = []
+    for key in list_partitions(db.connection()):
+        if key >= current or partition_end(key) > cutoff:
+            break
+        table = partition_table(key)
+        db.execute(text(f"""
+            INSERT INTO daily_spend (customer_id, day, category, type, total, txn_count, seeded)
+            SELECT customer_id, strftime('%Y-%m-%d', date), category, type, SUM(amount), COUNT(*), seeded
+            FROM {table.name} WHERE true
+            GROUP BY customer_id, strftime('%Y-%m-%d', date), category, type, seeded
+            ON CONFLICT (customer_id, day, category, type, seeded) DO UPDATE SET
+                total = total + excluded.total,
+                txn_count = txn_count + excluded.txn_count
+        """))
+        table.drop(bind=db.connection())
+        Base.metadata.remove(table)
+        compacted.append(key)
+        print(f"Compacted partition {key}")
+    db.commit()
+    return compacted
 
 def get_db():
     db = SessionLocal()
@@ -60,14 +302,39 @@ def get_db():
     finally:
         db.close()
 
-def seed_data():
+def clear_seeded(db):
+    """Delete the customers and transactions loaded from the CSVs, keeping
+    ingested transactions, risk scores and drift history."""
+    conn = db.connection()
+    db.query(Customer).delete()
+    for key in list_partitions(conn):
+        table = partition_table(key)
+        db.execute(table.delete().where(table.c.seeded))
+        if db.execute(select(table.c.id).limit(1)).first() is None:
+            table.drop(bind=conn)
+            Base.metadata.remove(table)
+    db.query(DailySpend).filter(DailySpend.seeded).delete()
+    db.commit()
+
+def seed_data(reload=False):
+    """Load the generated CSVs. An already seeded database is left alone
+    unless `reload` is set, which replaces the seeded rows (pipeline.py does
+    this whenever the CSVs change)."""
     print("Seeding database...")
     db = SessionLocal()
     
     # Check if data exists
     if db.query(Customer).count() > 0:
-        print("Database already seeded.")
-        return
+        if reload:
+            print("Removing previously seeded data...")
+            clear_seeded(db)
+        else:
+            print("Database already seeded.")
+            if db.query(MonthlySpend).count() == 0:
+                print("Building monthly rollups...")
+                build_monthly_rollups(db)
+            db.close()
+            return
 
     try:
         # Load CSVs
@@ -84,23 +351,41 @@ def seed_data():
         print("Inserting transactions...")
          # Validating dates
         df_transactions['date'] = pd.to_datetime(df_transactions['date'])
+        df_transactions['seeded'] = True
         
-        # SQLite bulk insert can be slow or hit limits, let's do chunks
+        # One partition per month; SQLite bulk insert can be slow or hit limits, let's do chunks
         chunk_size = 10000
-        for i in range(0, len(df_transactions), chunk_size):
-            chunk = df_transactions.iloc[i:i+chunk_size]
-            db.bulk_insert_mappings(Transaction, chunk.to_dict(orient='records'))
-            db.commit()
-            print(f"Inserted {i+len(chunk)} transactions...")
+        inserted = 0
+        for key, month_df in df_transactions.groupby(df_transactions['date'].dt.strftime("%Y%m")):
+            table = ensure_partition(db.connection(), key)
+            for i in range(0, len(month_df), chunk_size):
+                chunk = month_df.iloc[i:i+chunk_size]
+                db.execute(table.insert(), chunk.to_dict(orient='records'))
+                db.commit()
+                inserted += len(chunk)
+                print(f"Inserted {inserted} transactions...")
+
+        print("Building monthly rollups...")
+        build_monthly_rollups(db)
             
         print("Database seeding complete.")
         
     except Exception as e:
         print(f"Error seeding database: {e}")
         db.rollback()
+        raise
     finally:
         db.close()
 
 if __name__ == "__main__":
     init_db()
-    seed_data()
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "compact":
+        db = SessionLocal()
+        try:
+            compacted = compact_partitions(db)
+            print(f"Compacted {len(compacted)} partition(s).")
+        finally:
+            db.close()
+    else:
+        seed_data(reload=command == "reload")
@@ -0,0 +1,54 @@
+"""
+Multi-worker deployment:
+
+    gunicorn -c backend/gunicorn_conf.py backend.api:app
+
+The app, model and SHAP explainer are loaded once in the master and shared
+with the forked workers copy-on-write. A broker process bridges websocket
+alerts between workers (see backend/pubsub.py).
+
+Set WEB_CONCURRENCY to the number of workers (default 2). cpu_count() is not
+used: it reports the host's CPUs inside containers, and every worker still
+keeps its own copy of whatever pages it writes to.
+"""
+import gc
+import multiprocessing
+import os
+
+from backend.pubsub import BUS_SOCKET_ENV, run_broker
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Exported before the app is imported so every worker's startup hook finds it
+bus_socket = os.environ.setdefault(BUS_SOCKET_ENV, f"/tmp/lighthouse-bus-{os.getpid()}.sock")
+broker = None
+
+def when_ready(server):
+    global broker
+    from backend import api
+    api.preload()
+    # Keep the preloaded objects out of future GC passes, which would
+    # otherwise touch their pages in every worker and break sharing
+    gc.freeze()
+
+    # Spawned rather than forked: a fork would inherit the listening socket
+    # and gunicorn's signal handlers, and outlive the server
+    ctx = multiprocessing.get_context("spawn")
+    broker = ctx.Process(target=run_broker, args=(bus_socket,), daemon=True)
+    broker.start()
+    server.log.info(f"Alert broker listening on {bus_socket}")
+
+def post_fork(server, worker):
+    # Never share SQLite connections opened in the master with a worker
+    from backend.database import engine
+    engine.dispose(close=False)
+
+def on_exit(server):
+    if broker and broker.is_alive():
+        broker.terminate()
+        broker.join(5)
+    if os.path.exists(bus_socket):
+        os.unlink(bus_socket)
@@ -0,0 +1,140 @@
+"""
+Alert bus: delivers websocket alert events to clients connected to any API
+worker.
+
+Single-process servers use LocalBus, which hands events straight to the local
+ConnectionManager. Multi-worker servers (see gunicorn_conf.py) run a small
+broker process on a Unix socket; every worker connects with UnixSocketBus,
+publishes events to the broker and receives every event back to broadcast to
+its own websocket clients.
+"""
+import asyncio
+import json
+import os
+import random
+from datetime import datetime
+
+BUS_SOCKET_ENV = "LIGHTHOUSE_BUS_SOCKET"
+ALERT_THRESHOLD = 75 # scores above this raise an alert
+SIMULATION_INTERVAL = 2.0 # seconds between simulated transaction events
+RECONNECT_DELAY = 1.0
+
+async def simulate_alerts(publish):
+    """Demo transaction stream: a random customer's score moves every few seconds."""
+    while True:
+        # Simulate a transaction event every 2 seconds
+        await asyncio.sleep(SIMULATION_INTERVAL)
+
+        # Pick random customer
+        customer_id = random.randint(0, 500) # limiting to first 500 for demo overlap with delinquent
+
+        # Generate random score change
+        # In real system, we'd add txn and rescore. Here we mock:
+        new_score = random.uniform(10, 95)
+
+        await publish({
+            "customer_id": customer_id,
+            "name": f"Customer {customer_id}", # Ideally fetch name from DB but ok
+            "new_score": new_score,
+            "alert": new_score > ALERT_THRESHOLD,
+            "timestamp": datetime.now().isoformat()
+        })
+
+class LocalBus:
+    """In-process bus for a single worker; also runs the demo stream."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self.task = None
+
+    async def start(self):
+        self.task = asyncio.create_task(simulate_alerts(self.publish))
+
+    async def publish(self, event):
+        await self.deliver(event)
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+
+class UnixSocketBus:
+    """Worker side of the broker bridge. Events are newline-delimited JSON."""
+
+    def __init__(self, path, deliver):
+        self.path = path
+        self.deliver = deliver
+        self.writer = None
+        self.task = None
+
+    async def start(self):
+        self.task = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, self.writer = await asyncio.open_unix_connection(self.path)
+                while line := await reader.readline():
+                    await self.deliver(json.loads(line))
+            except Exception as e:
+                # A malformed or oversized line must not end the task and
+                # leave this worker deaf to alerts: reconnect instead
+                print(f"Alert bus connection lost: {e!r}")
+            if self.writer:
+                self.writer.close()
+            self.writer = None
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def publish(self, event):
+        if self.writer is None:
+            print("Alert bus not connected; dropping event")
+            return
+        try:
+            self.writer.write(json.dumps(event).encode() + b"\n")
+            await self.writer.drain()
+        except ConnectionError as e:
+            print(f"Alert bus publish failed ({e!r}); dropping event")
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+        if self.writer:
+            self.writer.close()
+
+async def serve_broker(path, simulate=True):
+    clients = set()
+
+    async def fan_out(line):
+        for writer in list(clients):
+            try:
+                writer.write(line)
+                await writer.drain()
+            except ConnectionError:
+                clients.discard(writer)
+
+    async def handle(reader, writer):
+        clients.add(writer)
+        try:
+            while line := await reader.readline():
+                await fan_out(line)
+        except ConnectionError:
+            pass
+        finally:
+            clients.discard(writer)
+            writer.close()
+
+    if os.path.exists(path):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(handle, path)
+    simulator = None
+    if simulate:
+        simulator = asyncio.create_task(simulate_alerts(lambda e: fan_out(json.dumps(e).encode() + b"\n")))
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if simulator:
+            simulator.cancel()
+
+def run_broker(path, simulate=True):
+    """Blocking entry point for the broker process."""
+    asyncio.run(serve_broker(path, simulate))
@@ -11,6 +11,8 @@ export default function CustomerDetail() {
     const navigate = useNavigate();
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(true);
+    const [olderTransactions, setOlderTransactions] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
 
     useEffect(() => {
         fetchCustomerDetail();
@@ -20,6 +22,8 @@ export default function CustomerDetail() {
         try {
             const res = await axios.get(`${API_URL}/customer/${id}`);
             setData(res.data);
+            setOlderTransactions([]);
+            setNextCursor(res.data.next_cursor);
         } catch (err) {
             console.error(err);
         } finally {
@@ -27,10 +31,30 @@ export default function CustomerDetail() {
         }
     };
 
+    const loadOlderTransactions = async () => {
+        try {
+            const res = await axios.get(`${API_URL}/customer/${id}/transactions`, { params: { cursor: nextCursor } });
+            setOlderTransactions(prev => [...prev, ...res.data.transactions]);
+            setNextCursor(res.data.next_cursor);
+        } catch (err) {
+            console.error(err);
+        }
+    };
+
     if (loading) return <div className="p-10 text-center">Loading customer details...</div>;
     if (!data) return <div className="p-10 text-center text-red-500">Customer not found</div>;
 
-    const { profile, risk_score, transactions } = data;
+    const { profile, risk_score, monthly_spending = [] } = data;
+    const transactions = [...data.transactions, ...olderTransactions];
+
+    // Monthly debit totals per category, from the precomputed rollup
+    const spendCategories = [...new Set(monthly_spending.filter(m => m.type === 'DEBIT').map(m => m.category))];
+    const monthlySpend = Object.values(monthly_spending.filter(m => m.type === 'DEBIT').reduce((acc, m) => {
+        acc[m.month] = acc[m.month] || { month: m.month };
+        acc[m.month][m.category] = Math.round(m.total);
+        return acc;
+    }, {}));
+    const spendColors = ['#2563eb', '#dc2626', '#16a34a', '#ca8a04', '#9333ea', '#0891b2', '#ea580c', '#64748b'];
     const currentScore = risk_score ? Math.round(risk_score.score) : 0;
 
     // Mock risk history for chart
@@ -126,6 +150,24 @@ export default function CustomerDetail() {
                 </div>
             </div>
 
+            {/* Monthly Spending */}
+            <div className="bg-white p-6 rounded-xl shadow-sm border border-slate-100">
+                <h3 className="text-lg font-bold text-slate-800 mb-4">Monthly Spending by Category</h3>
+                <div className="h-64">
+                    <ResponsiveContainer width="100%" height="100%">
+                        <BarChart data={monthlySpend}>
+                            <CartesianGrid strokeDasharray="3 3" vertical={false} />
+                            <XAxis dataKey="month" />
+                            <YAxis />
+                            <Tooltip />
+                            {spendCategories.map((c, i) => (
+                                <Bar key={c} dataKey={c} stackId="spend" fill={spendColors[i % spendColors.length]} />
+                            ))}
+                        </BarChart>
+                    </ResponsiveContainer>
+                </div>
+            </div>
+
             <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
                 {/* Transaction History */}
                 <div className="bg-white p-6 rounded-xl shadow-sm border border-slate-100 lg:col-span-2">
@@ -156,6 +198,11 @@ export default function CustomerDetail() {
                             </tbody>
                         </table>
                     </div>
+                    {nextCursor && (
+                        <button onClick={loadOlderTransactions} className="mt-4 w-full py-2 text-sm text-blue-600 hover:bg-blue-50 rounded-lg transition-colors">
+                            Load older transactions
+                        </button>
+                    )}
                 </div>
 
                 {/* Risk Factors */}
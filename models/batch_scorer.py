@@ -14,7 +14,8 @@ from datetime import datetime
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.database import SessionLocal, RiskScore, init_db
+from backend.database import SessionLocal, RiskScore, ScoringRun, init_db
+from models.drift import DriftSketch, load_baseline, baseline_hash, BASELINE_PATH
 
 def main():
     # Load model
@@ -74,6 +75,21 @@ def main():
         db.bulk_insert_mappings(RiskScore, batch)
         db.commit()
 
+    # Drift sketches for this run, compared against the training baseline
+    if os.path.exists(BASELINE_PATH):
+        baseline = load_baseline()
+        sketch = DriftSketch.like(baseline)
+        sketch.update(X, scores)
+        db.add(ScoringRun(source="batch", row_count=len(X), baseline_hash=baseline_hash(baseline),
+                          sketches=sketch.to_dict()))
+        db.commit()
+
+        print("\nDrift vs training baseline:")
+        for col, d in sketch.compare(baseline).items():
+            print(f"  {col:<20} PSI {d['psi']:.4f}  KS {d['ks']:.4f}  {d['status']}")
+    else:
+        print(f"\nNo drift baseline at {BASELINE_PATH}; run models/risk_model.py to create one.")
+
     db.close()
 
     high = sum(1 for s in scores if s > 70)
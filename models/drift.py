@@ -0,0 +1,281 @@
+"""
+Streaming drift sketches: mergeable quantile digests and histograms for the
+model features and the risk score, compared against the training baseline
+with PSI and KS. Memory per sketch is bounded by the digest compression and
+the number of histogram bins, not by the number of rows seen.
+"""
+import hashlib
+import json
+import numpy as np
+
+SCORE_COL = "score"
+BASELINE_PATH = "models/drift_baseline.json"
+BASELINE_BINS = 10 # histogram bins, cut at the baseline's deciles
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+class QuantileDigest:
+    """Merging t-digest with at most compression + 1 centroids.
+
+    While a column has no more than `compression` distinct values (counts,
+    day offsets, ...) every value is kept as an exact point mass and the CDF
+    is a step function; past that, neighbouring values are merged under the
+    arcsine (k1) scale function, keeping centroids small near the tails."""
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.exact = True
+        self.buffer = []
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def count(self):
+        return float(self.weights.sum()) + len(self.buffer)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.buffer.extend(values.tolist())
+        if len(self.buffer) > 5 * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        other._compress()
+        self._compress()
+        self.means = np.concatenate([self.means, other.means])
+        self.weights = np.concatenate([self.weights, other.weights])
+        self.exact = self.exact and other.exact
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(force=True)
+        return self
+
+    def _k(self, q):
+        return self.compression / (2 * np.pi) * np.arcsin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self, force=False):
+        if not self.buffer and not force:
+            return
+        means = np.concatenate([self.means, self.buffer])
+        weights = np.concatenate([self.weights, np.ones(len(self.buffer))])
+        self.buffer = []
+        if not len(means):
+            return
+
+        # Equal values always share a centroid
+        means, inverse = np.unique(means, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights)
+        if self.exact and len(means) <= self.compression:
+            self.means, self.weights = means, weights
+            return
+        self.exact = False
+
+        total = weights.sum()
+        new_means, new_weights = [means[0]], [weights[0]]
+        seen = 0.0
+        for m, w in zip(means[1:], weights[1:]):
+            cur_w = new_weights[-1]
+            if self._k((seen + cur_w + w) / total) - self._k(seen / total) <= 1:
+                new_means[-1] = (new_means[-1] * cur_w + m * w) / (cur_w + w)
+                new_weights[-1] = cur_w + w
+            else:
+                seen += cur_w
+                new_means.append(m)
+                new_weights.append(w)
+
+        self.means = np.array(new_means)
+        self.weights = np.array(new_weights)
+
+    def _cdf_points(self):
+        self._compress()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        xs = np.concatenate([[self.min], self.means, [self.max]])
+        ys = np.concatenate([[0.0], centers, [self.weights.sum()]]) / self.weights.sum()
+        return xs, ys
+
+    def support(self):
+        """Points where the CDF changes slope or steps."""
+        return self._cdf_points()[0]
+
+    def cdf(self, x):
+        if not self.count:
+            return np.zeros_like(np.asarray(x, dtype=float))
+        if self.exact:
+            self._compress()
+            cum = np.cumsum(self.weights) / self.weights.sum()
+            idx = np.searchsorted(self.means, x, side="right")
+            return np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0.0)
+        xs, ys = self._cdf_points()
+        return np.interp(x, xs, ys, left=0.0, right=1.0)
+
+    def quantile(self, q):
+        if not self.count:
+            return np.nan
+        if self.exact:
+            self._compress()
+            cum = np.cumsum(self.weights) / self.weights.sum()
+            return self.means[min(np.searchsorted(cum, q), len(self.means) - 1)]
+        xs, ys = self._cdf_points()
+        return np.interp(q, ys, xs)
+
+    def to_dict(self):
+        self._compress()
+        return {
+            "compression": self.compression,
+            "exact": self.exact,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+            "min": None if np.isinf(self.min) else float(self.min),
+            "max": None if np.isinf(self.max) else float(self.max),
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        digest = cls(d["compression"])
+        digest.exact = d.get("exact", False)
+        digest.means = np.array(d["means"], dtype=float)
+        digest.weights = np.array(d["weights"], dtype=float)
+        digest.min = np.inf if d["min"] is None else d["min"]
+        digest.max = -np.inf if d["max"] is None else d["max"]
+        return digest
+
+class Histogram:
+    """Counts over fixed right-closed bins (a, b], with open-ended first and
+    last bins. Right-closed keeps a value sitting exactly on a decile edge --
+    common for count features -- in the bin its quantile describes."""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) + 1)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        idx = np.searchsorted(self.edges, values, side="left")
+        self.counts += np.bincount(idx, minlength=len(self.counts))
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        return self
+
+    def to_dict(self):
+        return {"edges": self.edges.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, d):
+        hist = cls(d["edges"])
+        hist.counts = np.array(d["counts"], dtype=float)
+        return hist
+
+def psi(expected, actual, eps=1e-4):
+    """Population stability index between two histograms on the same bins."""
+    e = np.maximum(expected.counts / max(expected.counts.sum(), 1), eps)
+    a = np.maximum(actual.counts / max(actual.counts.sum(), 1), eps)
+    return float(np.sum((a - e) * np.log(a / e)))
+
+def ks(expected, actual):
+    """Kolmogorov-Smirnov statistic estimated from two digests' CDFs; exact
+    when both digests still hold every distinct value."""
+    if not expected.count or not actual.count:
+        return None
+    grid = np.union1d(expected.support(), actual.support())
+    return float(np.max(np.abs(expected.cdf(grid) - actual.cdf(grid))))
+
+class DriftSketch:
+    """Digest + histogram for each monitored column (features and score)."""
+
+    def __init__(self, edges, compression=100):
+        self.edges = edges
+        self.digests = {col: QuantileDigest(compression) for col in edges}
+        self.histograms = {col: Histogram(e) for col, e in edges.items()}
+        self.rows = 0
+
+    @property
+    def columns(self):
+        return list(self.edges)
+
+    @classmethod
+    def like(cls, baseline):
+        """Empty sketch with the baseline's columns and bin edges."""
+        return cls(baseline.edges)
+
+    def update(self, X, scores):
+        """Add a batch of feature rows (DataFrame) and their 0-100 scores."""
+        for col in self.columns:
+            values = scores if col == SCORE_COL else X[col].to_numpy()
+            self.digests[col].update(values)
+            self.histograms[col].update(values)
+        self.rows += len(X)
+
+    def merge(self, other):
+        for col in self.columns:
+            self.digests[col].merge(other.digests[col])
+            self.histograms[col].merge(other.histograms[col])
+        self.rows += other.rows
+        return self
+
+    def compare(self, baseline):
+        """PSI (histogram) and KS (digest) of every column versus the baseline."""
+        result = {}
+        for col in self.columns:
+            value = psi(baseline.histograms[col], self.histograms[col])
+            status = "stable"
+            if value >= PSI_SIGNIFICANT: status = "significant"
+            elif value >= PSI_MODERATE: status = "moderate"
+            result[col] = {
+                "psi": round(value, 4),
+                "ks": None if not self.rows else round(ks(baseline.digests[col], self.digests[col]), 4),
+                "median": None if not self.rows else float(self.digests[col].quantile(0.5)),
+                "baseline_median": float(baseline.digests[col].quantile(0.5)),
+                "status": status if self.rows else "no data",
+            }
+        return result
+
+    def to_dict(self):
+        return {
+            "rows": self.rows,
+            "columns": {col: {"digest": self.digests[col].to_dict(),
+                              "histogram": self.histograms[col].to_dict()}
+                        for col in self.columns},
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        edges = {col: c["histogram"]["edges"] for col, c in d["columns"].items()}
+        sketch = cls(edges)
+        for col, c in d["columns"].items():
+            sketch.digests[col] = QuantileDigest.from_dict(c["digest"])
+            sketch.histograms[col] = Histogram.from_dict(c["histogram"])
+        sketch.rows = d["rows"]
+        return sketch
+
+def baseline_hash(baseline):
+    """Identifies a baseline's bin edges; runs sketched against different
+    edges (i.e. before a retrain) cannot be merged with each other."""
+    return hashlib.sha256(json.dumps(baseline.edges, sort_keys=True).encode()).hexdigest()[:16]
+
+def build_baseline(X, scores, bins=BASELINE_BINS):
+    """Sketch of the training data, with histogram edges at its quantiles."""
+    qs = np.linspace(0, 1, bins + 1)[1:-1]
+    edges = {col: np.unique(np.quantile(X[col], qs)).tolist() for col in X.columns}
+    edges[SCORE_COL] = np.unique(np.quantile(scores, qs)).tolist()
+    baseline = DriftSketch(edges)
+    baseline.update(X, scores)
+    return baseline
+
+def save_baseline(baseline, path=BASELINE_PATH):
+    with open(path, "w") as f:
+        json.dump(baseline.to_dict(), f)
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path) as f:
+        return DriftSketch.from_dict(json.load(f))
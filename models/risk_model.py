@@ -8,6 +8,12 @@ import mlflow
 import mlflow.xgboost
 import pickle
 import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.drift import build_baseline, save_baseline, BASELINE_PATH
 
 def load_data():
     if not os.path.exists("data/feature_matrix.csv"):
@@ -64,6 +70,11 @@ def train_model(df):
         
     print("Model saved to models/xgboost_model.pkl")
 
+    # Drift baseline: training feature and score distributions
+    baseline = build_baseline(X_train, model.predict_proba(X_train)[:, 1] * 100)
+    save_baseline(baseline)
+    print(f"Drift baseline saved to {BASELINE_PATH}")
+
 if __name__ == "__main__":
     mlflow.autolog()
     
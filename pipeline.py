@@ -0,0 +1,193 @@
+"""
+Build pipeline: runs the offline stages (data generation, feature engineering,
+training, seeding, batch scoring) with content-hash caching.
+
+Each stage is fingerprinted from its command, code, config and input files plus
+the fingerprints of the stages it depends on; stages whose result depends on
+the date (compaction) also hash the relevant part of the clock. A stage is
+skipped when its fingerprint matches the last successful run and its outputs
+still exist.
+Stages whose dependencies are satisfied run concurrently.
+
+    python pipeline.py                 # run what is out of date
+    python pipeline.py --force train   # rerun a stage (and everything after it)
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+CACHE_PATH = ".pipeline_cache.json"
+HASH_CHUNK = 1 << 20
+
+@dataclass
+class Stage:
+    name: str
+    command: List[str]
+    inputs: List[str] # code, config and upstream artifacts read by the stage
+    outputs: List[str] = field(default_factory=list) # removed before a rerun
+    state: List[str] = field(default_factory=list) # updated in place; rerun if missing, never removed
+    deps: List[str] = field(default_factory=list)
+    clock: Optional[Callable[[], str]] = None # time-dependent part of the fingerprint
+
+def horizon_month():
+    """Compaction drops the partitions that end before the feature horizon,
+    so its result changes whenever the horizon crosses into a new month."""
+    from backend.database import horizon_cutoff, partition_key
+    return partition_key(horizon_cutoff())
+
+STAGES = [
+    Stage("generate", ["python", "data/synthetic_generator.py"],
+          inputs=["data/synthetic_generator.py"],
+          outputs=["data/customers.csv", "data/transactions.csv", "data/labels.csv"]),
+    Stage("features", ["python", "models/feature_engineering.py"],
+          inputs=["models/feature_engineering.py", "data/customers.csv",
+                  "data/transactions.csv", "data/labels.csv"],
+          outputs=["data/feature_matrix.csv"], deps=["generate"]),
+    Stage("train", ["python", "models/risk_model.py"],
+          inputs=["models/risk_model.py", "models/drift.py", "data/feature_matrix.csv"],
+          outputs=["models/xgboost_model.pkl", "models/drift_baseline.json"], deps=["features"]),
+    # lighthouse.db holds ingested transactions and drift history, so it is
+    # state rather than an output: a rerun replaces only the seeded rows
+    Stage("seed", ["python", "backend/database.py", "reload"],
+          inputs=["backend/database.py", "data/customers.csv", "data/transactions.csv"],
+          state=["lighthouse.db"], deps=["generate"]),
+    Stage("compact", ["python", "backend/database.py", "compact"],
+          inputs=["backend/database.py"], deps=["seed"], clock=horizon_month),
+    Stage("score", ["python", "models/batch_scorer.py"],
+          inputs=["models/batch_scorer.py", "models/drift.py", "backend/database.py",
+                  "models/xgboost_model.pkl", "models/drift_baseline.json",
+                  "data/feature_matrix.csv"],
+          deps=["train", "compact"]),
+]
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def fingerprint(stage, dep_fingerprints):
+    h = hashlib.sha256()
+    h.update(sys.version.encode())
+    h.update(json.dumps(stage.command).encode())
+    for path in stage.inputs:
+        h.update(path.encode())
+        h.update(hash_file(path).encode() if os.path.exists(path) else b"missing")
+    for dep in stage.deps:
+        h.update(dep_fingerprints[dep].encode())
+    if stage.clock:
+        h.update(stage.clock().encode())
+    return h.hexdigest()
+
+def load_cache():
+    if not os.path.exists(CACHE_PATH):
+        return {}
+    with open(CACHE_PATH) as f:
+        return json.load(f)
+
+def save_cache(cache):
+    with open(CACHE_PATH, "w") as f:
+        json.dump(cache, f, indent=2)
+
+def run_stage(stage):
+    for path in stage.outputs:
+        if os.path.exists(path):
+            os.remove(path)
+    command = [sys.executable if stage.command[0] == "python" else stage.command[0]] + stage.command[1:]
+    start = time.perf_counter()
+    proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return proc.returncode, proc.stdout, time.perf_counter() - start
+
+def descendants(names):
+    """Stages in `names` plus every stage downstream of them."""
+    result = set(names)
+    changed = True
+    while changed:
+        changed = False
+        for stage in STAGES:
+            if stage.name not in result and any(d in result for d in stage.deps):
+                result.add(stage.name)
+                changed = True
+    return result
+
+def run_pipeline(force=(), jobs=4):
+    cache = load_cache()
+    forced = descendants(force)
+    fingerprints = {}
+    report = {}
+    reran = set()
+    pending = list(STAGES)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for stage in [s for s in pending if all(d in report for d in s.deps)]:
+                pending.remove(stage)
+                # Never fingerprint below a failure: skipped stages have none
+                if any(report[d][0] in ("failed", "skipped") for d in stage.deps):
+                    report[stage.name] = ("skipped", 0.0)
+                    continue
+
+                start = time.perf_counter()
+                fp = fingerprint(stage, fingerprints)
+                fingerprints[stage.name] = fp
+                up_to_date = (
+                    stage.name not in forced
+                    and cache.get(stage.name) == fp
+                    and not any(d in reran for d in stage.deps)
+                    and all(os.path.exists(p) for p in stage.outputs + stage.state)
+                )
+                if up_to_date:
+                    report[stage.name] = ("cached", time.perf_counter() - start)
+                    print(f"[{stage.name}] up to date")
+                    continue
+
+                print(f"[{stage.name}] running: {' '.join(stage.command)}")
+                running[pool.submit(run_stage, stage)] = stage
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                returncode, output, elapsed = future.result()
+                for line in output.splitlines():
+                    print(f"[{stage.name}] {line}")
+                reran.add(stage.name)
+                if returncode == 0:
+                    cache[stage.name] = fingerprints[stage.name]
+                    report[stage.name] = ("ran", elapsed)
+                else:
+                    cache.pop(stage.name, None)
+                    report[stage.name] = ("failed", elapsed)
+                save_cache(cache)
+
+    print("\nStage       Status    Time")
+    for stage in STAGES:
+        status, elapsed = report[stage.name]
+        print(f"{stage.name:<11} {status:<9} {elapsed:6.2f}s")
+    hits = sum(1 for status, _ in report.values() if status == "cached")
+    print(f"Cache hits: {hits}/{len(STAGES)}")
+
+    return all(status in ("ran", "cached") for status, _ in report.values())
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline build pipeline with stage caching.")
+    parser.add_argument("--force", nargs="*", default=[], choices=[s.name for s in STAGES],
+                        help="rerun these stages and everything downstream")
+    parser.add_argument("--jobs", type=int, default=4, help="maximum stages run concurrently")
+    args = parser.parse_args()
+
+    if not run_pipeline(force=args.force, jobs=args.jobs):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()